@@ -1,10 +1,16 @@
-import redis
 import uvicorn
 from fastapi import FastAPI
+from redis import asyncio as aioredis
+from sqlmodel import SQLModel
 
-from src.api.v1.resources import posts, users
-from src.core import config
-from src.db import cache, redis_cache
+from src.api.v1.resources import admin, posts, users
+from src.auth import epoch
+from src.core import config, profiling
+from src.core.limiter import ConcurrencyLimitMiddleware
+from src.core.profiling import ProfilingMiddleware, TracedRedis
+from src.db import cache, engine, feed, leaderboard, memory, redis_cache
+from src.jobs import JobQueue, queue
+from src.jobs.inline import InlineJobQueue
 
 app = FastAPI(
     # Конфигурируем название проекта. Оно будет отображаться в документации
@@ -17,6 +23,10 @@ app = FastAPI(
     openapi_url="/api/openapi.json",
 )
 
+app.add_middleware(ConcurrencyLimitMiddleware)
+# Добавлен последним, чтобы быть внешним и учитывать время в очереди лимитера
+app.add_middleware(ProfilingMiddleware)
+
 
 @app.get("/")
 def root():
@@ -26,30 +36,79 @@ def root():
 @app.on_event("startup")
 def startup():
     """Подключаемся к базам при старте сервера"""
+    if config.EMBEDDED_MODE:
+        startup_embedded()
+        return
+
     cache.cache = redis_cache.CacheRedis(
-        cache_instance=redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=1
+        cache_instance=TracedRedis(
+            connection_pool=redis_cache.create_redis_pool(db=1)
         )
     )
-    cache.blocked_access_tokens = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=2
-        )
+    # Медленные запросы всех воркеров собираем в общий буфер
+    profiling.slow_traces = profiling.RedisSlowTraceBuffer(
+        redis_instance=cache.cache.cache
+    )
+    # Рейтинг хранится в той же базе Redis, что и кэш постов
+    leaderboard.leaderboard = leaderboard.Leaderboard(
+        redis_instance=cache.cache.cache
+    )
+    # Публикация через общий клиент, подписка — через отдельный асинхронный
+    feed.post_feed = feed.PostFeed(
+        redis_instance=cache.cache.cache,
+        async_redis=aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                decode_responses=True,
+                max_connections=config.REDIS_FEED_CONNECTIONS,
+                timeout=config.REDIS_POOL_TIMEOUT,
+            ),
+        ),
+    )
+    cache.blocked_access_tokens = TracedRedis(
+        connection_pool=redis_cache.create_redis_pool(db=2)
+    )
+    # Эпохи токенов храним рядом с заблокированными токенами
+    epoch.token_epochs = epoch.TokenEpochs(
+        redis_instance=cache.blocked_access_tokens
+    )
+
+    cache.active_refresh_tokens = TracedRedis(
+        connection_pool=redis_cache.create_redis_pool(db=3)
+    )
 
-    cache.active_refresh_tokens = redis.Redis(
-            host=config.REDIS_HOST,
-            port=config.REDIS_PORT,
-            max_connections=10,
-            decode_responses=True,
-            db=3
+    queue.jobs = JobQueue(
+        redis_instance=TracedRedis(
+            connection_pool=redis_cache.create_redis_pool(db=config.JOBS_REDIS_DB)
         )
+    )
+
+
+def startup_embedded():
+    """Встроенный режим: SQLite и хранилища в памяти процесса вместо Redis"""
+    SQLModel.metadata.create_all(engine)
+    cache.cache = memory.CacheMemory(cache_instance=memory.MemoryStore())
+    leaderboard.leaderboard = memory.MemoryLeaderboard()
+    feed.post_feed = memory.MemoryPostFeed()
+    # Токены не вытесняем, иначе заблокированный токен снова станет рабочим
+    cache.blocked_access_tokens = memory.MemoryStore(max_entries=None)
+    epoch.token_epochs = epoch.TokenEpochs(
+        redis_instance=cache.blocked_access_tokens
+    )
+    cache.active_refresh_tokens = memory.MemoryStore(max_entries=None)
+    queue.jobs = InlineJobQueue()
+
+
+@app.on_event("startup")
+async def start_post_feed():
+    """Одна подписка на ленту новых постов на воркер"""
+    await feed.post_feed.start()
+
+
+@app.on_event("shutdown")
+async def stop_post_feed():
+    await feed.post_feed.stop()
 
 
 @app.on_event("shutdown")
@@ -59,11 +118,13 @@ def shutdown():
     cache.cache.close()
     cache.active_refresh_tokens.close()
     cache.blocked_access_tokens.close()
+    queue.jobs.close()
 
 
 # Подключаем роутеры к серверу
 app.include_router(router=posts.router, prefix="/api/v1/posts")
 app.include_router(router=users.router, prefix="/api/v1")
+app.include_router(router=admin.router, prefix="/api/v1/admin")
 
 if __name__ == "__main__":
     # Приложение может запускаться командой
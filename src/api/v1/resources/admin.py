@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.auth import get_token
+from src.core.profiling import ProfiledRoute, get_slow_traces
+from src.services import UserService, get_user_service
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get(
+    path="/slow_requests",
+    summary="Последние медленные и профилированные запросы всех воркеров",
+    tags=["admin"],
+)
+def slow_requests(
+        user_service: UserService = Depends(get_user_service),
+        token: str = Depends(get_token),
+) -> dict:
+    user = user_service.current_user(token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if not user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    return {"requests": get_slow_traces()}
@@ -1,45 +1,150 @@
+import asyncio
 from http import HTTPStatus
-from typing import Optional
-from fastapi import HTTPException, status
-from src.api.v1.schemas import PostCreate, PostListResponse, PostModel
-from src.services import PostService, get_post_service
+from typing import AsyncIterator, List, Optional
+from fastapi import Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from src.api.v1.schemas import (
+    POST_FIELDS,
+    PostCreate,
+    PostListResponse,
+    PostModel,
+    PostPartial,
+    PostPartialListResponse,
+)
+from src.services import PostService, UserService, get_post_service, get_user_service
 from fastapi import APIRouter, Depends
 from src.auth import get_token
-from src.services.user import UserService, get_user_service
+from src.core.profiling import ProfiledRoute
+from src.core import config
+from src.db import PostFeed, get_post_feed
+
+router = APIRouter(route_class=ProfiledRoute)
+
 
-router = APIRouter()
+def get_fields(
+        fields: Optional[str] = Query(
+            None, description=f"Поля через запятую: {', '.join(POST_FIELDS)}"
+        ),
+) -> Optional[list]:
+    """Разобрать ?fields=. id возвращается всегда."""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if unknown := requested - set(POST_FIELDS):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"unknown fields: {', '.join(sorted(unknown))}",
+        )
+    requested.add("id")
+    return [field for field in POST_FIELDS if field in requested]
 
 
 @router.get(
     path="/",
-    response_model=PostListResponse,
+    response_model=PostPartialListResponse,
+    response_model_exclude_unset=True,
     summary="Список постов",
     tags=["posts"],
 )
 def post_list(
+        fields: Optional[list] = Depends(get_fields),
         post_service: PostService = Depends(get_post_service),
-) -> PostListResponse:
-    posts: dict = post_service.get_post_list()
+) -> PostPartialListResponse:
+    posts: dict = post_service.get_post_list(fields=fields)
     if not posts:
         # Если посты не найдены, отдаём 404 статус
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="posts not found")
+    return PostPartialListResponse(**posts)
+
+
+async def _feed_events(
+        request: Request, feed: PostFeed, last_event_id: Optional[int],
+) -> AsyncIterator[str]:
+    yield f"retry: {config.FEED_HEARTBEAT_SECONDS * 1000}\n\n"
+    async with feed.subscribe(last_event_id=last_event_id) as queue:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=config.FEED_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Комментарий-heartbeat держит соединение через прокси
+                yield ": heartbeat\n\n"
+                continue
+            if event is None:
+                # Клиент не успевал читать, пусть переподключится с Last-Event-ID
+                return
+            event_id, data = event
+            yield f"id: {event_id}\nevent: post\ndata: {data}\n\n"
+
+
+@router.get(
+    path="/stream",
+    summary="Лента новых постов (Server-Sent Events)",
+    tags=["posts"],
+)
+async def post_stream(
+        request: Request,
+        last_event_id: Optional[int] = Header(None),
+        feed: PostFeed = Depends(get_post_feed),
+) -> StreamingResponse:
+    return StreamingResponse(
+        _feed_events(request, feed, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    path="/batch",
+    response_model=PostListResponse,
+    summary="Получить несколько постов",
+    tags=["posts"],
+)
+def post_batch(
+        ids: List[int] = Query(...),
+        post_service: PostService = Depends(get_post_service),
+) -> PostListResponse:
+    if len(ids) > config.POSTS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"too many ids, max {config.POSTS_BATCH_MAX_SIZE}",
+        )
+    posts: dict = post_service.get_post_batch(item_ids=ids)
+    return PostListResponse(**posts)
+
+
+@router.get(
+    path="/popular",
+    response_model=PostListResponse,
+    summary="Популярные посты",
+    tags=["posts"],
+)
+def post_popular(
+        limit: int = Query(10, ge=1, le=config.POSTS_POPULAR_MAX_SIZE),
+        post_service: PostService = Depends(get_post_service),
+) -> PostListResponse:
+    posts: dict = post_service.get_popular_posts(limit=limit)
     return PostListResponse(**posts)
 
 
 @router.get(
     path="/{post_id}",
-    response_model=PostModel,
+    response_model=PostPartial,
+    response_model_exclude_unset=True,
     summary="Получить определенный пост",
     tags=["posts"],
 )
 def post_detail(
-        post_id: int, post_service: PostService = Depends(get_post_service),
-) -> PostModel:
-    post: Optional[dict] = post_service.get_post_detail(item_id=post_id)
+        post_id: int,
+        fields: Optional[list] = Depends(get_fields),
+        post_service: PostService = Depends(get_post_service),
+) -> PostPartial:
+    post: Optional[dict] = post_service.get_post_detail(item_id=post_id, fields=fields)
     if not post:
         # Если пост не найден, отдаём 404 статус
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="post not found")
-    return PostModel(**post)
+    return PostPartial(**post)
 
 
 @router.post(
@@ -55,5 +160,5 @@ def post_create(
     user = user_service.current_user(token)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    post: dict = post_service.create_post(post=post)
+    post: dict = post_service.create_post(post=post, author=user)
     return PostModel(**post)
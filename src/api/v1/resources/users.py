@@ -1,9 +1,13 @@
+from typing import Optional
 from fastapi import status
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from src.auth import get_token
+from src.core.profiling import ProfiledRoute
 from src.auth.schema import Token
-from src.services.user import UserService, get_user_service
+from src.core import config
+from src.services import PostService, UserService, get_post_service, get_user_service
+from src.api.v1.schemas.posts import PostTimelineResponse
 from src.api.v1.schemas.users import (
     UserLogin,
     UserUpdate,
@@ -11,7 +15,7 @@ from src.api.v1.schemas.users import (
     UserCreate
 )
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post(
@@ -121,3 +125,24 @@ def update_user(
     user = user_service.update_user(user, update_data.dict(exclude_unset=True))
     access_token = user_service.create_access_token(user.uuid)
     return {"msg": "Update", "user": UserAbout(**user.dict()), "access_token": access_token}
+
+
+@router.get(
+    path='/users/{uuid}/posts',
+    response_model=PostTimelineResponse,
+    summary="Посты пользователя",
+    tags=['users'],
+)
+def user_posts(
+        uuid: str,
+        cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+        limit: int = Query(config.TIMELINE_PAGE_SIZE, ge=1, le=config.TIMELINE_MAX_PAGE_SIZE),
+        post_service: PostService = Depends(get_post_service),
+) -> PostTimelineResponse:
+    try:
+        timeline = post_service.get_author_timeline(author_uuid=uuid, cursor=cursor, limit=limit)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+    if timeline is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="user not found")
+    return PostTimelineResponse(**timeline)
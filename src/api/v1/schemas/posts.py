@@ -1,10 +1,15 @@
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 __all__ = (
     "PostModel",
     "PostCreate",
     "PostListResponse",
+    "PostPartial",
+    "PostPartialListResponse",
+    "PostTimelineResponse",
+    "POST_FIELDS",
 )
 
 
@@ -24,3 +29,24 @@ class PostModel(PostBase):
 
 class PostListResponse(BaseModel):
     posts: list[PostModel] = []
+
+
+class PostTimelineResponse(PostListResponse):
+    # Курсор следующей страницы, None — страниц больше нет
+    next_cursor: Optional[str] = None
+
+
+# Поля, которые можно запросить через ?fields=
+POST_FIELDS = ("id", "title", "description", "created_at")
+
+
+class PostPartial(BaseModel):
+    """Пост с подмножеством полей. Отдаётся с response_model_exclude_unset."""
+    id: int
+    title: Optional[str]
+    description: Optional[str]
+    created_at: Optional[datetime]
+
+
+class PostPartialListResponse(BaseModel):
+    posts: list[PostPartial] = []
@@ -1,5 +1,6 @@
 from . import schema
 from .auth import get_token
+from .epoch import TokenEpochs, get_token_epochs
 from .token import (
     create_tokens,
     create_refresh_token,
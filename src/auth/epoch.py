@@ -0,0 +1,58 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from redis import Redis
+
+from src.core import config
+
+__all__ = ("TokenEpochs", "get_token_epochs")
+
+
+class TokenEpochs:
+    """
+    Эпоха токенов пользователя: счётчик в Redis, который увеличивает
+    «выход со всех устройств». Токены с эпохой меньше текущей недействительны.
+    Значения кэшируются в процессе на TOKEN_EPOCH_CACHE_SECONDS.
+    """
+
+    max_local_entries = 10_000
+
+    def __init__(self, redis_instance: Redis, cache_seconds: float = config.TOKEN_EPOCH_CACHE_SECONDS):
+        self.redis = redis_instance
+        self.cache_seconds = cache_seconds
+        self._local: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, user_uuid: str, fresh: bool = False) -> int:
+        """
+        Текущая эпоха. fresh=True — читать из Redis мимо локального кэша:
+        при выпуске токена устаревшая эпоха сделала бы его сразу отозванным.
+        """
+        cached = self._local.get(user_uuid)
+        if not fresh and cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        epoch = int(self.redis.get(self._key(user_uuid)) or 0)
+        self._remember(user_uuid, epoch)
+        return epoch
+
+    def bump(self, user_uuid: str) -> int:
+        """Отозвать все выданные пользователю токены."""
+        epoch = self.redis.incr(self._key(user_uuid))
+        self._remember(user_uuid, epoch)
+        return epoch
+
+    def _remember(self, user_uuid: str, epoch: int) -> None:
+        if len(self._local) >= self.max_local_entries:
+            self._local.clear()
+        self._local[user_uuid] = (epoch, time.monotonic() + self.cache_seconds)
+
+    @staticmethod
+    def _key(user_uuid: str) -> str:
+        return f"epoch:{user_uuid}"
+
+
+token_epochs: Optional[TokenEpochs] = None
+
+
+# Функция понадобится при внедрении зависимостей
+def get_token_epochs() -> TokenEpochs:
+    return token_epochs
@@ -14,24 +14,24 @@ from src.core.config import (
 
 
 
-def create_tokens(subject: dict) -> Token:
-    access_token = create_access_token(subject)
-    refresh_token = create_refresh_token(subject)
+def create_tokens(subject: dict, epoch: int = 0) -> Token:
+    access_token = create_access_token(subject, epoch)
+    refresh_token = create_refresh_token(subject, epoch)
     return Token(
         access_token=access_token,
         refresh_token=refresh_token,
     )
 
 
-def create_access_token(subject: dict) -> str:
-    return _create_token(subject, "access", JWT_ACCESS_EXPIRE_SECONDS)
+def create_access_token(subject: dict, epoch: int = 0) -> str:
+    return _create_token(subject, "access", JWT_ACCESS_EXPIRE_SECONDS, epoch)
 
 
-def create_refresh_token(subject: dict) -> str:
-    return _create_token(subject, "refresh", JWT_REFRESH_EXPIRE_SECONDS)
+def create_refresh_token(subject: dict, epoch: int = 0) -> str:
+    return _create_token(subject, "refresh", JWT_REFRESH_EXPIRE_SECONDS, epoch)
 
 
-def _create_token(subject: dict, token_type: str, exp: int) -> str:
+def _create_token(subject: dict, token_type: str, exp: int, epoch: int = 0) -> str:
     if not isinstance(subject, dict):
         raise ValueError("subject must be a dict!")
 
@@ -41,6 +41,8 @@ def _create_token(subject: dict, token_type: str, exp: int) -> str:
         "exp": now + exp,
         "type": token_type,
         "jti": str(uuid.uuid4()),
+        # Эпоха токенов пользователя на момент выпуска, см. TokenEpochs
+        "epoch": epoch,
     }
     token_data.update(subject)
 
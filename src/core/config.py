@@ -3,18 +3,114 @@ from pathlib import Path
 
 VERSION: str = "1.0.0"
 
+
+def _available_cpus() -> int:
+    """Количество CPU, доступных процессу (с учётом cpuset контейнера)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 # JWT SETTINGS
 JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "foo")
 JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_ACCESS_EXPIRE_SECONDS: int = 60 * 15
 JWT_REFRESH_EXPIRE_SECONDS: int = 60 * 60
+# Сколько секунд воркер кэширует эпоху токенов пользователя. После
+# «выхода со всех устройств» другие воркеры примут старый токен не дольше этого
+TOKEN_EPOCH_CACHE_SECONDS: float = float(os.getenv("TOKEN_EPOCH_CACHE_SECONDS", 5))
 # Название проекта. Используется в Swagger-документации
 PROJECT_NAME: str = os.getenv("PROJECT_NAME", "ylab_hw_3")
 
+# Настройки сервера
+# Количество воркеров uvicorn. 0 — по числу доступных CPU. Ограничивается
+# бюджетом соединений к Redis и Postgres, см. MAX_WORKERS
+WORKERS: int = int(os.getenv("WORKERS", 0)) or _available_cpus()
+SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.getenv("SERVER_PORT", 8000))
+# Сколько секунд ждём завершения текущих запросов после SIGTERM
+GRACEFUL_TIMEOUT: int = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+
+# Долгоживущие потоковые ответы: не учитываются лимитером и профилировщиком
+STREAMING_PATHS: tuple = ("/api/v1/posts/stream",)
+
+# Адаптивный лимит одновременных запросов (на воркер, отдельно для
+# классов маршрутов auth / read / write)
+LIMITER_INITIAL_LIMIT: int = int(os.getenv("LIMITER_INITIAL_LIMIT", 10))
+LIMITER_MIN_LIMIT: int = 1
+# Не больше размера threadpool, в котором выполняются sync-обработчики
+LIMITER_MAX_LIMIT: int = int(os.getenv("LIMITER_MAX_LIMIT", 40))
+LIMITER_MAX_QUEUE: int = int(os.getenv("LIMITER_MAX_QUEUE", 50))
+# Сколько секунд запрос может ждать в очереди, прежде чем получит 503
+LIMITER_QUEUE_TIMEOUT: float = float(os.getenv("LIMITER_QUEUE_TIMEOUT", 1.0))
+# Целевая задержка обработки в секундах: выше неё лимит уменьшается
+LIMITER_LATENCY_TARGET: dict = {
+    "auth": 1.0,  # bcrypt
+    "read": 0.3,
+    "write": 0.5,
+}
+
+# Профилирование запросов. Запрос с заголовком X-Profile: <PROFILING_TOKEN>
+# профилируется через cProfile; пустой токен отключает заголовок
+PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", "")
+# Доля запросов, профилируемых случайно (0.0 — выключено)
+PROFILING_SAMPLE_RATE: float = float(os.getenv("PROFILING_SAMPLE_RATE", 0.0))
+# Запросы дольше порога сохраняются вместе с SQL и Redis-командами
+SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", 1.0))
+SLOW_TRACES_BUFFER_SIZE: int = 100
+
 # Настройки Redis
 REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
+# Общий лимит соединений к Redis на все процессы: воркеры uvicorn и
+# воркер очереди. Размеры пулов — в разделе «Бюджет соединений»
+REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 100))
+# Пулы воркера: кэш, заблокированные и активные токены, очередь задач
+REDIS_POOLS_PER_WORKER: int = 4
+# Подписка ленты держит одно соединение вне пулов
+REDIS_FEED_CONNECTIONS: int = 1
+# Сколько секунд ждать свободное соединение, прежде чем вернуть ошибку
+REDIS_POOL_TIMEOUT: int = int(os.getenv("REDIS_POOL_TIMEOUT", 5))
 CACHE_EXPIRE_IN_SECONDS: int = 60 * 5  # 5 минут
+# Максимум постов в одном запросе /posts/batch
+POSTS_BATCH_MAX_SIZE: int = 100
+# Максимум постов в /posts/popular
+POSTS_POPULAR_MAX_SIZE: int = 100
+# Сколько ждём пересборку рейтинга, прежде чем разрешить повторную
+LEADERBOARD_REBUILD_LOCK_SECONDS: int = 60 * 5
+# Пока рейтинг пересобирается, ответ из Postgres кэшируется на это время
+POSTS_POPULAR_FALLBACK_EXPIRE_IN_SECONDS: int = 30
+# Размер страницы ленты автора; первая страница такого размера кэшируется
+TIMELINE_PAGE_SIZE: int = 20
+TIMELINE_MAX_PAGE_SIZE: int = 100
+
+# Лента новых постов (SSE + Redis pub/sub)
+FEED_CHANNEL: str = os.getenv("FEED_CHANNEL", "posts:new")
+# Сколько последних событий помним для продолжения по Last-Event-ID
+FEED_BACKLOG_SIZE: int = 100
+# Сколько событий может ждать отправки одному клиенту, иначе отключаем его
+FEED_QUEUE_SIZE: int = 50
+FEED_HEARTBEAT_SECONDS: int = 15
+
+# Настройки очереди фоновых задач (Redis Streams)
+JOBS_REDIS_DB: int = int(os.getenv("JOBS_REDIS_DB", 4))
+JOBS_STREAM: str = os.getenv("JOBS_STREAM", "jobs")
+JOBS_DEAD_LETTER_STREAM: str = os.getenv("JOBS_DEAD_LETTER_STREAM", "jobs:dead")
+JOBS_GROUP: str = os.getenv("JOBS_GROUP", "workers")
+JOBS_DELAYED_KEY: str = os.getenv("JOBS_DELAYED_KEY", "jobs:delayed")
+# Ограничение длины только для dead letter: основной поток хранит лишь
+# необработанные задачи, обработанные удаляются после ack
+JOBS_DEAD_LETTER_MAXLEN: int = 100_000
+JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+# Экспоненциальная задержка повтора: 1, 2, 4, ... но не больше 5 минут
+JOBS_RETRY_BASE_DELAY_SECONDS: float = 1.0
+JOBS_RETRY_MAX_DELAY_SECONDS: float = 60 * 5
+# Через сколько миллисекунд задачу упавшего воркера забирает другой
+JOBS_CLAIM_IDLE_MS: int = 60 * 1000
+JOBS_DONE_EXPIRE_IN_SECONDS: int = 60 * 60 * 24  # сутки
+# Просмотры копятся в Redis и сохраняются в Postgres пачкой раз в период
+VIEWS_FLUSH_INTERVAL_SECONDS: int = int(os.getenv("VIEWS_FLUSH_INTERVAL_SECONDS", 10))
+VIEWS_FLUSH_LOCK_SECONDS: int = 60
 
 # Настройки Postgres
 POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
@@ -22,8 +118,42 @@ POSTGRES_PORT: int = int(os.getenv("POSTGRES_PORT", 5432))
 POSTGRES_DB: str = os.getenv("POSTGRES_DB", "ylab_hw")
 POSTGRES_USER: str = os.getenv("POSTGRES_USER", "ylab_hw")
 POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "ylab_hw")
+# Общий лимит соединений к Postgres на все процессы (max_connections сервера
+# по умолчанию 100, оставляем запас под миграции и админку)
+POSTGRES_MAX_CONNECTIONS: int = int(os.getenv("POSTGRES_MAX_CONNECTIONS", 80))
+
+# Бюджет соединений. Воркер очереди (ylab_worker) выполняет задачи по одной,
+# поэтому ему резервируем по соединению на пул: в Redis — кэш и очередь
+# задач, в Postgres — один. Остальное делится между воркерами uvicorn
+JOBS_WORKER_REDIS_POOL_SIZE: int = 1
+JOBS_WORKER_REDIS_CONNECTIONS: int = 2 * JOBS_WORKER_REDIS_POOL_SIZE
+JOBS_WORKER_POSTGRES_POOL_SIZE: int = 1
+_redis_budget = REDIS_MAX_CONNECTIONS - JOBS_WORKER_REDIS_CONNECTIONS
+_postgres_budget = POSTGRES_MAX_CONNECTIONS - JOBS_WORKER_POSTGRES_POOL_SIZE
+# Каждому воркеру нужно хотя бы по соединению на пул, иначе бюджет
+# превышается; лишние воркеры не запускаем
+MAX_WORKERS: int = min(
+    _redis_budget // (REDIS_POOLS_PER_WORKER + REDIS_FEED_CONNECTIONS),
+    _postgres_budget,
+)
+if MAX_WORKERS < 1:
+    raise RuntimeError(
+        "REDIS_MAX_CONNECTIONS or POSTGRES_MAX_CONNECTIONS is too small for a single worker"
+    )
+WORKERS = min(WORKERS, MAX_WORKERS)
+REDIS_POOL_SIZE: int = (_redis_budget // WORKERS - REDIS_FEED_CONNECTIONS) // REDIS_POOLS_PER_WORKER
+POSTGRES_POOL_SIZE: int = _postgres_budget // WORKERS
+
+DATABASE_URL: str = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+)
 
-DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Встроенный режим: DATABASE_URL указывает на SQLite (например,
+# sqlite:///./ylab_hw.db), вместо Redis используются хранилища в памяти
+# процесса. Работает в одном воркере
+EMBEDDED_MODE: bool = DATABASE_URL.startswith("sqlite")
+MEMORY_CACHE_MAX_ENTRIES: int = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", 10_000))
 
 # Корень проекта
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -0,0 +1,149 @@
+import asyncio
+import collections
+import time
+from typing import Deque, Dict, Optional
+
+from src.core import config
+
+__all__ = ("AdaptiveLimiter", "ConcurrencyLimitMiddleware")
+
+AUTH_PATHS = frozenset((
+    "/api/v1/signup",
+    "/api/v1/login",
+    "/api/v1/refresh",
+    "/api/v1/logout",
+    "/api/v1/logout_all",
+))
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class AdaptiveLimiter:
+    """
+    Лимит одновременных запросов с очередью ожидания ограниченной длины.
+    Лимит подстраивается по AIMD: растёт на 1/limit за каждый быстрый
+    запрос и умножается на backoff, когда задержка выше целевой или
+    обработчик вернул 5xx.
+    """
+
+    def __init__(
+            self,
+            latency_target: float,
+            initial_limit: int = config.LIMITER_INITIAL_LIMIT,
+            min_limit: int = config.LIMITER_MIN_LIMIT,
+            max_limit: int = config.LIMITER_MAX_LIMIT,
+            max_queue: int = config.LIMITER_MAX_QUEUE,
+            queue_timeout: float = config.LIMITER_QUEUE_TIMEOUT,
+            backoff: float = 0.9,
+    ):
+        self.latency_target = latency_target
+        self.limit: float = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    async def acquire(self) -> bool:
+        """Занять слот. False — запрос нужно отклонить."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # Слот передаётся ожидающему в release(), in_flight уже увеличен
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._discard(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        return True
+
+    def release(self, latency: float, failed: bool) -> None:
+        if failed or latency > self.latency_target:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif self.in_flight >= self.limit / 2:
+            # Увеличиваем лимит, только если он действительно используется
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def route_class(scope: dict) -> str:
+    if scope["path"] in AUTH_PATHS:
+        return "auth"
+    if scope["method"] in READ_METHODS:
+        return "read"
+    return "write"
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware: при перегрузке быстро отвечает 503 вместо очереди без границ."""
+
+    def __init__(self, app, limiters: Optional[Dict[str, AdaptiveLimiter]] = None):
+        self.app = app
+        self.limiters = limiters or {
+            name: AdaptiveLimiter(latency_target=target)
+            for name, target in config.LIMITER_LATENCY_TARGET.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in config.STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[route_class(scope)]
+        if not await limiter.acquire():
+            await self._reject(send)
+            return
+
+        status_code = 500
+        started = time.monotonic()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.monotonic() - started, failed=status_code >= 500)
+
+    @staticmethod
+    async def _reject(send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": b'{"detail":"service overloaded"}',
+        })
@@ -0,0 +1,257 @@
+import asyncio
+import collections
+import cProfile
+import functools
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from redis import Redis
+from redis.client import Pipeline
+from sqlalchemy import event
+
+from src.core import config
+
+__all__ = (
+    "RequestTrace",
+    "SlowTraceBuffer",
+    "RedisSlowTraceBuffer",
+    "ProfilingMiddleware",
+    "ProfiledRoute",
+    "TracedRedis",
+    "install_sql_tracing",
+    "get_slow_traces",
+)
+
+logger = logging.getLogger(__name__)
+
+# Сколько SQL/Redis-команд храним на один запрос
+MAX_CALLS_PER_TRACE = 200
+MAX_STATEMENT_LENGTH = 500
+
+
+class RequestTrace:
+    """SQL, Redis-команды и профиль одного запроса."""
+
+    def __init__(self, method: str, path: str, profile: bool):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.duration: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.calls: List[dict] = []
+        self.profiler: Optional[cProfile.Profile] = cProfile.Profile() if profile else None
+
+    def record(self, kind: str, statement: str, duration: float) -> None:
+        if len(self.calls) < MAX_CALLS_PER_TRACE:
+            self.calls.append({
+                "kind": kind,
+                "statement": statement[:MAX_STATEMENT_LENGTH],
+                "duration": duration,
+            })
+
+    def profile_stats(self, limit: int = 30) -> Optional[str]:
+        if self.profiler is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def dict(self) -> dict:
+        return {
+            "id": self.id,
+            "pid": os.getpid(),
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "duration": self.duration,
+            "status_code": self.status_code,
+            "calls": self.calls,
+            "profile": self.profile_stats(),
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+class SlowTraceBuffer:
+    """
+    Кольцевой буфер медленных и профилированных запросов в памяти процесса.
+    Подходит только для одного воркера, иначе видна лишь часть запросов.
+    """
+
+    def __init__(self, size: int = config.SLOW_TRACES_BUFFER_SIZE):
+        self._traces: Deque[dict] = collections.deque(maxlen=size)
+
+    def add(self, trace: dict) -> None:
+        self._traces.append(trace)
+
+    def get_all(self) -> List[dict]:
+        return list(reversed(self._traces))
+
+
+class RedisSlowTraceBuffer(SlowTraceBuffer):
+    """Общий для всех воркеров кольцевой буфер в списке Redis."""
+
+    key = "profiling:slow_traces"
+
+    def __init__(self, redis_instance: Redis, size: int = config.SLOW_TRACES_BUFFER_SIZE):
+        self.redis = redis_instance
+        self.size = size
+
+    def add(self, trace: dict) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.lpush(self.key, json.dumps(trace))
+        pipe.ltrim(self.key, 0, self.size - 1)
+        pipe.execute()
+
+    def get_all(self) -> List[dict]:
+        return [json.loads(trace) for trace in self.redis.lrange(self.key, 0, -1)]
+
+
+slow_traces: SlowTraceBuffer = SlowTraceBuffer()
+
+
+def get_slow_traces() -> List[dict]:
+    return slow_traces.get_all()
+
+
+@contextmanager
+def _timed(kind: str, statement: str):
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(kind, statement, time.perf_counter() - started)
+
+
+def install_sql_tracing(engine) -> None:
+    """Записывать SQL-запросы движка в трассу текущего запроса."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._trace_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record("sql", statement, time.perf_counter() - context._trace_started)
+
+
+class TracedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        commands = " ".join(str(args[0]) for args, _ in self.command_stack)
+        with _timed("redis", f"PIPELINE {commands}"):
+            return super().execute(raise_on_error=raise_on_error)
+
+
+class TracedRedis(Redis):
+    """Клиент Redis, записывающий команды в трассу текущего запроса."""
+
+    def execute_command(self, *args, **options):
+        with _timed("redis", str(args[0])):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return TracedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+def _profiled(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None or trace.profiler is None:
+            return func(*args, **kwargs)
+        trace.profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            trace.profiler.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Маршрут, sync-обработчик которого профилируется, если профилирование
+    включено для запроса. cProfile работает в пределах одного потока,
+    поэтому включаем его внутри потока threadpool, где выполняется обработчик.
+    """
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if call is not None and not asyncio.iscoroutinefunction(call):
+            self.dependant.call = _profiled(call)
+        return super().get_route_handler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: трассирует каждый запрос, профилирует запросы с
+    заголовком X-Profile (равным PROFILING_TOKEN) или по PROFILING_SAMPLE_RATE,
+    сохраняет медленные и профилированные запросы в кольцевой буфер.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in config.STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"], profile=self._should_profile(scope))
+        token = _current_trace.set(trace)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status_code = message["status"]
+                if trace.profiler is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", trace.id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - started
+            if trace.profiler is not None or trace.duration >= config.SLOW_REQUEST_SECONDS:
+                # Отчёт cProfile и запись в Redis блокируют, выносим из event loop
+                await run_in_threadpool(self._save, trace)
+
+    @staticmethod
+    def _save(trace: RequestTrace) -> None:
+        try:
+            slow_traces.add(trace.dict())
+        except Exception:
+            logger.exception("Failed to save trace of %s %s", trace.method, trace.path)
+
+    @staticmethod
+    def _should_profile(scope) -> bool:
+        if config.PROFILING_TOKEN:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, config.PROFILING_TOKEN.encode())
+        return random.random() < config.PROFILING_SAMPLE_RATE
@@ -0,0 +1,73 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from types import FrameType
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from src.core import config
+from src.db import feed
+
+__all__ = ("DrainingServer", "run")
+
+logger = logging.getLogger(__name__)
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    Сервер, который по SIGTERM перестаёт принимать соединения и даёт
+    текущим запросам до GRACEFUL_TIMEOUT секунд на завершение. SSE-потоки
+    бесконечны, поэтому их закрываем сразу.
+    """
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if not self.should_exit:
+            loop = asyncio.get_event_loop()
+            loop.call_later(config.GRACEFUL_TIMEOUT, self._force_exit)
+            # Обработчик сигнала прерывает event loop, поэтому не трогаем
+            # очереди подписчиков отсюда, а планируем закрытие в нём
+            if feed.post_feed is not None:
+                loop.call_soon_threadsafe(feed.post_feed.close_subscribers)
+        super().handle_exit(sig, frame)
+
+    def _force_exit(self) -> None:
+        self.force_exit = True
+
+
+def run() -> None:
+    """Запуск приложения в production: несколько воркеров на все CPU"""
+    # Во встроенном режиме состояние хранится в памяти процесса
+    workers = 1 if config.EMBEDDED_MODE else config.WORKERS
+    if workers < int(os.getenv("WORKERS", 0)):
+        logger.warning("WORKERS limited to %s by the Redis/Postgres connection budget", workers)
+    # Воркеры запускаются через spawn и заново читают конфиг,
+    # поэтому фиксируем число воркеров для расчёта размеров пулов
+    os.environ["WORKERS"] = str(workers)
+
+    server_config = uvicorn.Config(
+        "main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        workers=workers,
+        loop="uvloop" if _has_module("uvloop") else "asyncio",
+        http="httptools" if _has_module("httptools") else "h11",
+        proxy_headers=True,
+    )
+    server = DrainingServer(config=server_config)
+
+    if server_config.workers > 1:
+        sock = server_config.bind_socket()
+        Multiprocess(server_config, target=server.run, sockets=[sock]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    run()
@@ -1,3 +1,6 @@
 from .cache import *
 from .db import *
 from .redis_cache import *
+from .leaderboard import *
+from .feed import *
+from .memory import *
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from typing import Dict, List, Optional, Union
 
 __all__ = (
     "AbstractCache",
@@ -28,6 +28,28 @@ class AbstractCache(ABC):
     ):
         pass
 
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Значения в порядке ключей, None для отсутствующих"""
+        pass
+
+    @abstractmethod
+    def set_many(
+            self,
+            mapping: Dict[str, Union[bytes, str]],
+            expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        pass
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        pass
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Атомарно увеличить счётчик без срока жизни"""
+        pass
+
     @abstractmethod
     def close(self):
         pass
@@ -1,10 +1,50 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine
 from src.core import config
+from src.core.profiling import install_sql_tracing
 
-__all__ = ("get_session",)
+__all__ = ("engine", "create_db_engine", "get_session")
 
 
-engine = create_engine(config.DATABASE_URL, echo=True)
+def create_db_engine(pool_size: int = config.POSTGRES_POOL_SIZE):
+    """Движок Postgres с пулом в пределах бюджета соединений процесса"""
+    return create_engine(
+        config.DATABASE_URL,
+        echo=True,
+        pool_size=pool_size,
+        max_overflow=0,
+    )
+
+
+if config.EMBEDDED_MODE:
+    engine = create_engine(
+        config.DATABASE_URL,
+        echo=True,
+        # Sync-обработчики выполняются в разных потоках threadpool
+        connect_args={"check_same_thread": False},
+        # SQLAlchemy 1.4 по умолчанию не держит пул для файловой SQLite,
+        # и PRAGMA ниже выполнялись бы на каждую сессию
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: читатели не блокируют писателя
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA cache_size=-20000")  # 20 МБ
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+else:
+    # Пул делится между воркерами, чтобы суммарно не превысить лимит сервера
+    engine = create_db_engine()
+install_sql_tracing(engine)
 
 
 def get_session():
@@ -0,0 +1,140 @@
+import asyncio
+import collections
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional, Set, Tuple
+
+from redis import Redis
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError
+
+from src.core import config
+
+__all__ = ("PostFeed", "get_post_feed")
+
+logger = logging.getLogger(__name__)
+
+# (id события, данные) — id события совпадает с id поста
+Event = Tuple[int, str]
+
+
+class PostFeed:
+    """
+    Лента новых постов. Публикация идёт в канал Redis, а каждый воркер
+    держит одну подписку и раздаёт события своим SSE-клиентам через
+    очереди ограниченного размера. Последние события хранятся в буфере
+    для продолжения по Last-Event-ID.
+    """
+
+    def __init__(
+            self,
+            redis_instance: Redis,
+            async_redis: aioredis.Redis,
+            channel: str = config.FEED_CHANNEL,
+            backlog_size: int = config.FEED_BACKLOG_SIZE,
+            queue_size: int = config.FEED_QUEUE_SIZE,
+    ):
+        self.redis = redis_instance
+        self.async_redis = async_redis
+        self.channel = channel
+        self.queue_size = queue_size
+        self._backlog: Deque[Event] = collections.deque(maxlen=backlog_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def publish(self, post_id: int, data: str) -> None:
+        self.redis.publish(self.channel, json.dumps({"id": post_id, "data": data}))
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self.async_redis.close()
+        await self.async_redis.connection_pool.disconnect()
+
+    def close_subscribers(self) -> None:
+        """
+        Завершить все SSE-потоки при остановке сервера: иначе открытые
+        соединения держат воркер до GRACEFUL_TIMEOUT. Клиенты переподключатся
+        к другому воркеру по Last-Event-ID. Вызывается в event loop.
+        """
+        self._closed = True
+        for queue in list(self._subscribers):
+            self._disconnect(queue)
+
+    @asynccontextmanager
+    async def subscribe(self, last_event_id: Optional[int] = None) -> AsyncIterator[asyncio.Queue]:
+        """
+        Очередь событий для одного клиента. None в очереди означает, что
+        клиент не успевал читать или сервер останавливается, и клиент
+        должен переподключиться с Last-Event-ID.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._closed:
+            queue.put_nowait(None)
+            yield queue
+            return
+        if last_event_id is not None:
+            missed = [event for event in self._backlog if event[0] > last_event_id]
+            for event in missed[-self.queue_size:]:
+                queue.put_nowait(event)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.async_redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        self._dispatch(message["data"])
+                    except (ValueError, KeyError, TypeError):
+                        # Битое сообщение пропускаем, не переподписываясь
+                        logger.exception("Malformed post feed message: %r", message["data"])
+            except asyncio.CancelledError:
+                raise
+            except ConnectionError:
+                logger.warning("Post feed subscription lost, reconnecting")
+                await asyncio.sleep(1)
+            except Exception:
+                # Например, TimeoutError: задача не должна завершиться молча
+                # и навсегда оставить клиентов воркера без событий
+                logger.exception("Post feed subscription failed, reconnecting")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def _dispatch(self, raw: str) -> None:
+        message = json.loads(raw)
+        event: Event = (message["id"], message["data"])
+        self._backlog.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Медленный клиент: отключаем, он догонит по Last-Event-ID
+                self._disconnect(queue)
+
+    def _disconnect(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+post_feed: Optional[PostFeed] = None
+
+
+# Функция понадобится при внедрении зависимостей
+def get_post_feed() -> PostFeed:
+    return post_feed
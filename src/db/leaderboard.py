@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from src.core import config
+
+__all__ = ("Leaderboard", "get_leaderboard")
+
+
+class Leaderboard:
+    """Рейтинг популярных постов в sorted set Redis: post_id -> просмотры."""
+
+    key = "posts:popular"
+    ready_key = "posts:popular:ready"
+    rebuild_lock_key = "posts:popular:rebuilding"
+    # Просмотры, ещё не сохранённые в Postgres: post_id -> прирост
+    pending_views_key = "posts:views:pending"
+    flushing_views_key = "posts:views:flushing"
+    flush_lock_key = "posts:views:flush-lock"
+
+    def __init__(self, redis_instance: Redis):
+        self.redis = redis_instance
+
+    def add(self, post_id: int, views: int = 0) -> None:
+        # NX: повторное добавление не сбрасывает накопленные просмотры
+        self.redis.zadd(self.key, {post_id: views}, nx=True)
+
+    def record_view(self, post_id: int) -> None:
+        # Рейтинг и счётчик для Postgres обновляются за один round-trip
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zincrby(self.key, 1, post_id)
+        pipe.hincrby(self.pending_views_key, post_id, 1)
+        pipe.execute()
+
+    def take_pending_views(self) -> Dict[int, int]:
+        """
+        Забрать накопленные просмотры для сохранения в Postgres. Пока
+        выгрузка не подтверждена через confirm_pending_views, новые просмотры
+        копятся отдельно, а неподтверждённая пачка отдаётся повторно.
+        Пустой словарь, если выгрузку уже выполняет другой процесс.
+        """
+        if not self.redis.set(
+                self.flush_lock_key, 1, nx=True, ex=config.VIEWS_FLUSH_LOCK_SECONDS
+        ):
+            return {}
+        if not self.redis.exists(self.flushing_views_key):
+            try:
+                self.redis.rename(self.pending_views_key, self.flushing_views_key)
+            except ResponseError:
+                # Новых просмотров не было
+                self.redis.delete(self.flush_lock_key)
+                return {}
+        pending = self.redis.hgetall(self.flushing_views_key)
+        return {int(post_id): int(views) for post_id, views in pending.items()}
+
+    def confirm_pending_views(self) -> None:
+        self.redis.delete(self.flushing_views_key, self.flush_lock_key)
+
+    def release_pending_views(self) -> None:
+        """Выгрузка не удалась: пачка останется до следующей попытки."""
+        self.redis.delete(self.flush_lock_key)
+
+    def top(self, limit: int) -> List[int]:
+        return [int(post_id) for post_id in self.redis.zrevrange(self.key, 0, limit - 1)]
+
+    def is_ready(self) -> bool:
+        """False, если рейтинг ещё не строился или Redis потерял данные."""
+        return bool(self.redis.exists(self.ready_key))
+
+    def lock_rebuild(self) -> bool:
+        """
+        Захватить право на пересборку. Пока блокировка жива, остальные
+        запросы не ставят задачу повторно; по истечении срока пересборку
+        можно запустить снова, если прошлая так и не завершилась.
+        """
+        return bool(self.redis.set(
+            self.rebuild_lock_key, 1, nx=True, ex=config.LEADERBOARD_REBUILD_LOCK_SECONDS
+        ))
+
+    def rebuild(self, rows: Iterable[Tuple[int, int]], chunk_size: int = 1000) -> None:
+        """Пересобрать рейтинг из пар (post_id, views) и атомарно подменить старый."""
+        tmp_key = f"{self.key}:rebuild"
+        self.redis.delete(tmp_key)
+        chunk, total = {}, 0
+        for post_id, views in rows:
+            chunk[post_id] = views
+            total += 1
+            if len(chunk) >= chunk_size:
+                self.redis.zadd(tmp_key, chunk)
+                chunk = {}
+        if chunk:
+            self.redis.zadd(tmp_key, chunk)
+
+        pipe = self.redis.pipeline(transaction=True)
+        if total:
+            pipe.rename(tmp_key, self.key)
+        else:
+            pipe.delete(self.key)
+        pipe.set(self.ready_key, 1)
+        pipe.delete(self.rebuild_lock_key)
+        pipe.execute()
+
+
+leaderboard: Optional[Leaderboard] = None
+
+
+# Функция понадобится при внедрении зависимостей
+def get_leaderboard() -> Leaderboard:
+    return leaderboard
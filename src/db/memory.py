@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NoReturn, Optional, Tuple, Union
+
+from src.core import config
+from src.db.cache import AbstractCache
+from src.db.feed import PostFeed
+from src.db.leaderboard import Leaderboard
+
+__all__ = (
+    "MemoryStore",
+    "CacheMemory",
+    "MemoryLeaderboard",
+    "MemoryPostFeed",
+)
+
+
+class MemoryStore:
+    """
+    Потокобезопасное хранилище ключ-значение в памяти процесса с TTL и
+    LRU-вытеснением. Поддерживает подмножество команд Redis, которое
+    используют кэш и хранилища токенов. max_entries=None — без вытеснения.
+    """
+
+    def __init__(self, max_entries: Optional[int] = config.MEMORY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            return self._get(name)
+
+    def mget(self, keys: List[str]) -> List[Any]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._put(name, value, ex)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._get(name) is not None for name in names)
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._get(name) or 0) + amount
+            self._put(name, value, None)
+            return value
+
+    def lpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            items = list(reversed(values)) + (self._get(name) or [])
+            self._put(name, items, None)
+            return len(items)
+
+    def close(self) -> None:
+        pass
+
+    def _get(self, name: str) -> Any:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        self._data.move_to_end(name)
+        return value
+
+    def _put(self, name: str, value: Any, ex: Optional[int]) -> None:
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[name] = (value, expires_at)
+        self._data.move_to_end(name)
+        if self.max_entries is not None:
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class CacheMemory(AbstractCache):
+    def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(name=key)
+
+    def set(
+            self,
+            key: str,
+            value: Union[bytes, str],
+            expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        self.cache.set(name=key, value=value, ex=expire)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return self.cache.mget(keys)
+
+    def set_many(
+            self,
+            mapping: Dict[str, Union[bytes, str]],
+            expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        for key, value in mapping.items():
+            self.cache.set(name=key, value=value, ex=expire)
+
+    def delete(self, *keys: str):
+        self.cache.delete(*keys)
+
+    def incr(self, key: str) -> int:
+        return self.cache.incr(name=key)
+
+    def close(self) -> NoReturn:
+        self.cache.close()
+
+
+class MemoryLeaderboard(Leaderboard):
+    """Рейтинг популярных постов в памяти процесса."""
+
+    def __init__(self):
+        super().__init__(redis_instance=None)
+        self._scores: Dict[int, int] = {}
+        self._ready = False
+        self._rebuild_locked_until = 0.0
+        self._pending_views: Dict[int, int] = {}
+        self._flushing_views: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, post_id: int, views: int = 0) -> None:
+        with self._lock:
+            self._scores.setdefault(post_id, views)
+
+    def record_view(self, post_id: int) -> None:
+        with self._lock:
+            self._scores[post_id] = self._scores.get(post_id, 0) + 1
+            self._pending_views[post_id] = self._pending_views.get(post_id, 0) + 1
+
+    def take_pending_views(self) -> Dict[int, int]:
+        # Выгрузка идёт из единственного потока задач, блокировка не нужна
+        with self._lock:
+            if not self._flushing_views:
+                self._flushing_views, self._pending_views = self._pending_views, {}
+            return dict(self._flushing_views)
+
+    def confirm_pending_views(self) -> None:
+        with self._lock:
+            self._flushing_views = {}
+
+    def release_pending_views(self) -> None:
+        pass
+
+    def top(self, limit: int) -> List[int]:
+        with self._lock:
+            return heapq.nlargest(limit, self._scores, key=self._scores.__getitem__)
+
+    def is_ready(self) -> bool:
+        return self._ready
+
+    def lock_rebuild(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._rebuild_locked_until > now:
+                return False
+            self._rebuild_locked_until = now + config.LEADERBOARD_REBUILD_LOCK_SECONDS
+            return True
+
+    def rebuild(self, rows: Iterable[Tuple[int, int]], chunk_size: int = 1000) -> None:
+        scores = dict(rows)
+        with self._lock:
+            self._scores = scores
+            self._ready = True
+            self._rebuild_locked_until = 0.0
+
+
+class MemoryPostFeed(PostFeed):
+    """Лента новых постов без Redis: события раздаются внутри процесса."""
+
+    def __init__(self):
+        super().__init__(redis_instance=None, async_redis=None)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, post_id: int, data: str) -> None:
+        # Вызывается из потока threadpool, раздача — в event loop
+        if self._loop is not None:
+            message = json.dumps({"id": post_id, "data": data})
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
@@ -1,9 +1,29 @@
-from typing import NoReturn, Optional, Union
+from typing import Dict, List, NoReturn, Optional, Union
+
+from redis import BlockingConnectionPool
 
 from src.core import config
 from src.db import AbstractCache
 
-__all__ = ("CacheRedis",)
+__all__ = ("CacheRedis", "create_redis_pool")
+
+
+def create_redis_pool(
+        db: int, max_connections: int = config.REDIS_POOL_SIZE,
+) -> BlockingConnectionPool:
+    """
+    Пул соединений к базе Redis в пределах бюджета воркера. При нехватке
+    соединений запрос ждёт освободившееся до REDIS_POOL_TIMEOUT секунд,
+    а не получает ошибку сразу.
+    """
+    return BlockingConnectionPool(
+        host=config.REDIS_HOST,
+        port=config.REDIS_PORT,
+        db=db,
+        decode_responses=True,
+        max_connections=max_connections,
+        timeout=config.REDIS_POOL_TIMEOUT,
+    )
 
 
 class CacheRedis(AbstractCache):
@@ -18,5 +38,28 @@ class CacheRedis(AbstractCache):
     ):
         self.cache.set(name=key, value=value, ex=expire)
 
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return self.cache.mget(keys)
+
+    def set_many(
+            self,
+            mapping: Dict[str, Union[bytes, str]],
+            expire: int = config.CACHE_EXPIRE_IN_SECONDS,
+    ):
+        # MSET не умеет TTL, поэтому отправляем SET EX одной пачкой
+        pipe = self.cache.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(name=key, value=value, ex=expire)
+        pipe.execute()
+
+    def delete(self, *keys: str):
+        if keys:
+            self.cache.delete(*keys)
+
+    def incr(self, key: str) -> int:
+        return self.cache.incr(name=key)
+
     def close(self) -> NoReturn:
         self.cache.close()
@@ -0,0 +1 @@
+from .queue import *
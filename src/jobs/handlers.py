@@ -0,0 +1,60 @@
+import logging
+
+from sqlalchemy import bindparam, func, update
+from sqlmodel import Session
+
+from src.db import cache, db, leaderboard
+from src.jobs.queue import job_handler
+from src.models import Post
+
+__all__ = ("post_created", "leaderboard_rebuild", "flush_post_views")
+
+logger = logging.getLogger("jobs")
+
+
+@job_handler("post.created")
+def post_created(payload: dict) -> None:
+    """Побочные эффекты создания поста: прогрев кэша и рейтинг."""
+    with Session(db.engine) as session:
+        post = session.get(Post, payload["post_id"])
+    if post is None:
+        return
+    # Повторная запись того же значения безопасна, обработчик идемпотентен
+    cache.cache.set(key=f"{post.id}", value=post.json())
+    leaderboard.leaderboard.add(post.id)
+
+
+@job_handler("leaderboard.rebuild")
+def leaderboard_rebuild(payload: dict) -> None:
+    """Пересобрать рейтинг популярных постов из Postgres."""
+    with Session(db.engine) as session:
+        rows = session.query(Post.id, Post.views).yield_per(1000)
+        leaderboard.leaderboard.rebuild((post_id, views or 0) for post_id, views in rows)
+
+
+def flush_post_views() -> None:
+    """
+    Сохранить накопленные просмотры в Postgres одним пакетным UPDATE.
+    Вызывается периодически, а не задачей на каждый просмотр.
+    """
+    pending = leaderboard.leaderboard.take_pending_views()
+    if not pending:
+        return
+    table = Post.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("post_id"))
+        .values(views=func.coalesce(table.c.views, 0) + bindparam("delta"))
+    )
+    try:
+        with Session(db.engine) as session:
+            session.execute(
+                statement,
+                [{"post_id": post_id, "delta": delta} for post_id, delta in pending.items()],
+            )
+            session.commit()
+    except Exception:
+        leaderboard.leaderboard.release_pending_views()
+        raise
+    leaderboard.leaderboard.confirm_pending_views()
+    logger.info("Flushed views of %s posts", len(pending))
@@ -0,0 +1,65 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core import config
+from src.jobs import handlers
+from src.jobs.queue import Job, JobQueue, get_handler, retry_delay
+
+__all__ = ("InlineJobQueue",)
+
+logger = logging.getLogger("jobs")
+
+
+class InlineJobQueue(JobQueue):
+    """
+    Очередь для встроенного режима: задачи выполняются в фоновом потоке
+    этого же процесса. Не переживает перезапуск, поэтому только для
+    одноузловых развёртываний.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs")
+        # Периодическая выгрузка просмотров идёт через тот же поток задач
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_views, name="views-flush", daemon=True)
+        self._flusher.start()
+
+    def enqueue(self, name: str, payload: dict) -> str:
+        job = Job(name=name, payload=payload)
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._flusher.join()
+        self._executor.submit(self._run_flush)
+        self._executor.shutdown(wait=True)
+
+    def _flush_views(self) -> None:
+        while not self._stopped.wait(config.VIEWS_FLUSH_INTERVAL_SECONDS):
+            self._executor.submit(self._run_flush)
+
+    @staticmethod
+    def _run_flush() -> None:
+        try:
+            handlers.flush_post_views()
+        except Exception:
+            logger.exception("Views flush failed")
+
+    @staticmethod
+    def _run(job: Job) -> None:
+        handler = get_handler(job.name)
+        if handler is None:
+            logger.error("Unknown job %s, id=%s", job.name, job.id)
+            return
+        for attempt in range(config.JOBS_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(retry_delay(attempt))
+            try:
+                handler(job.payload)
+                return
+            except Exception:
+                logger.exception("Job %s failed, id=%s, attempt=%s", job.name, job.id, attempt)
+        logger.error("Job %s dropped after %s attempts, id=%s", job.name, config.JOBS_MAX_ATTEMPTS, job.id)
@@ -0,0 +1,175 @@
+import json
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from src.core import config
+
+__all__ = (
+    "Job",
+    "JobQueue",
+    "job_handler",
+    "get_handler",
+    "get_job_queue",
+    "retry_delay",
+)
+
+# Обработчики задач по имени: handler(payload: dict) -> None
+_handlers: Dict[str, Callable[[dict], None]] = {}
+
+
+def job_handler(name: str):
+    """Зарегистрировать обработчик задачи. Обработчик должен быть идемпотентным."""
+    def decorator(func: Callable[[dict], None]) -> Callable[[dict], None]:
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def get_handler(name: str) -> Optional[Callable[[dict], None]]:
+    return _handlers.get(name)
+
+
+def retry_delay(attempt: int) -> float:
+    """Задержка перед попыткой номер attempt (начиная с 1)."""
+    delay = config.JOBS_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1)
+    return min(delay, config.JOBS_RETRY_MAX_DELAY_SECONDS)
+
+
+# Атомарно переносит наступившие отложенные задачи из sorted set в поток,
+# чтобы задачу не потерять и не запустить дважды при нескольких воркерах
+_PROMOTE_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(items) do
+    local job = cjson.decode(item)
+    redis.call('XADD', KEYS[2], '*',
+        'id', job.id, 'name', job.name, 'payload', job.payload, 'attempt', job.attempt)
+    redis.call('ZREM', KEYS[1], item)
+end
+return #items
+"""
+
+
+class Job:
+    def __init__(self, name: str, payload: dict, job_id: Optional[str] = None, attempt: int = 0):
+        self.name = name
+        self.payload = payload
+        self.id = job_id or str(uuid.uuid4())
+        self.attempt = attempt
+
+    def to_fields(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "payload": json.dumps(self.payload),
+            "attempt": self.attempt,
+        }
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> "Job":
+        return cls(
+            name=fields["name"],
+            payload=json.loads(fields["payload"]),
+            job_id=fields["id"],
+            attempt=int(fields.get("attempt", 0)),
+        )
+
+
+class JobQueue:
+    """Очередь задач на Redis Streams с группой потребителей."""
+
+    def __init__(self, redis_instance: Redis):
+        self.redis = redis_instance
+        self.stream = config.JOBS_STREAM
+        self.group = config.JOBS_GROUP
+        self._promote_due = redis_instance.register_script(_PROMOTE_DUE_SCRIPT)
+
+    def enqueue(self, name: str, payload: dict) -> str:
+        """Поставить задачу в очередь. Возвращает id задачи."""
+        job = Job(name=name, payload=payload)
+        self.redis.xadd(self.stream, job.to_fields())
+        return job.id
+
+    def ensure_group(self) -> None:
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as error:
+            # Группа уже создана другим воркером
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    def read(self, consumer: str, count: int = 10, block_ms: int = 5000) -> list:
+        """Получить новые задачи для этого потребителя."""
+        response = self.redis.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        if not response:
+            return []
+        _, messages = response[0]
+        return messages
+
+    def claim_stale(self, consumer: str, count: int = 10) -> list:
+        """Забрать задачи, зависшие у упавших воркеров."""
+        _, messages, *_ = self.redis.xautoclaim(
+            self.stream, self.group, consumer,
+            min_idle_time=config.JOBS_CLAIM_IDLE_MS, count=count,
+        )
+        return [message for message in messages if message[1]]
+
+    def promote_due(self, count: int = 100) -> int:
+        """Вернуть в поток отложенные задачи, время повтора которых наступило."""
+        return self._promote_due(
+            keys=[config.JOBS_DELAYED_KEY, self.stream], args=[time.time(), count]
+        )
+
+    def ack(self, message_id: str) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        self._ack(pipe, message_id)
+        pipe.execute()
+
+    def retry(self, message_id: str, job: Job) -> None:
+        """
+        Отложить задачу с экспоненциальной задержкой или отправить
+        в dead letter после MAX_ATTEMPTS.
+        """
+        job.attempt += 1
+        pipe = self.redis.pipeline(transaction=True)
+        if job.attempt >= config.JOBS_MAX_ATTEMPTS:
+            pipe.xadd(
+                config.JOBS_DEAD_LETTER_STREAM, job.to_fields(),
+                maxlen=config.JOBS_DEAD_LETTER_MAXLEN,
+            )
+        else:
+            retry_at = time.time() + retry_delay(job.attempt)
+            pipe.zadd(config.JOBS_DELAYED_KEY, {json.dumps(job.to_fields()): retry_at})
+        self._ack(pipe, message_id)
+        pipe.execute()
+
+    def is_done(self, job: Job) -> bool:
+        return bool(self.redis.exists(self._done_key(job)))
+
+    def mark_done(self, job: Job) -> None:
+        self.redis.set(self._done_key(job), 1, ex=config.JOBS_DONE_EXPIRE_IN_SECONDS)
+
+    def close(self) -> None:
+        self.redis.close()
+
+    def _ack(self, pipe, message_id: str) -> None:
+        # Обработанную запись удаляем: в потоке остаются только задачи в работе
+        pipe.xack(self.stream, self.group, message_id)
+        pipe.xdel(self.stream, message_id)
+
+    @staticmethod
+    def _done_key(job: Job) -> str:
+        return f"jobs:done:{job.id}"
+
+
+jobs: Optional[JobQueue] = None
+
+
+# Функция понадобится при внедрении зависимостей
+def get_job_queue() -> JobQueue:
+    return jobs
@@ -0,0 +1,123 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+import redis
+
+from src.core import config
+from src.db import cache, db, leaderboard, redis_cache
+from src.jobs import handlers  # noqa: F401 — регистрирует обработчики
+from src.jobs.queue import Job, JobQueue, get_handler
+
+logger = logging.getLogger("jobs")
+
+
+class Worker:
+    """Воркер очереди: читает задачи из группы потребителей и выполняет их."""
+
+    def __init__(self, queue: JobQueue):
+        self.queue = queue
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.should_exit = False
+        self._next_flush = time.monotonic() + config.VIEWS_FLUSH_INTERVAL_SECONDS
+
+    def handle_exit(self, sig, frame) -> None:
+        # Дорабатываем текущую пачку и выходим
+        self.should_exit = True
+
+    def run(self) -> None:
+        self.queue.ensure_group()
+        logger.info("Worker %s started", self.consumer)
+        while not self.should_exit:
+            self.queue.promote_due()
+            # Короткая блокировка, чтобы отложенные задачи не ждали дольше секунды
+            messages = (
+                self.queue.claim_stale(self.consumer)
+                or self.queue.read(self.consumer, block_ms=1000)
+            )
+            for message_id, fields in messages:
+                self.process(message_id, Job.from_fields(fields))
+            self.flush_views()
+        # Не оставляем накопленные просмотры до следующего запуска
+        self.flush_views(force=True)
+        logger.info("Worker %s stopped", self.consumer)
+
+    def flush_views(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self._next_flush:
+            return
+        self._next_flush = now + config.VIEWS_FLUSH_INTERVAL_SECONDS
+        try:
+            handlers.flush_post_views()
+        except Exception:
+            logger.exception("Views flush failed")
+
+    def process(self, message_id: str, job: Job) -> None:
+        if self.queue.is_done(job):
+            # Задача уже выполнена, но ack потерялся
+            self.queue.ack(message_id)
+            return
+
+        handler = get_handler(job.name)
+        if handler is None:
+            logger.error("Unknown job %s, id=%s", job.name, job.id)
+            self.queue.retry(message_id, job)
+            return
+
+        try:
+            handler(job.payload)
+        except Exception:
+            logger.exception("Job %s failed, id=%s, attempt=%s", job.name, job.id, job.attempt)
+            self.queue.retry(message_id, job)
+            return
+
+        self.queue.mark_done(job)
+        self.queue.ack(message_id)
+
+
+def startup() -> JobQueue:
+    """Подключаемся к базам при старте воркера"""
+    # Задачи выполняются по одной: свой пул из зарезервированных соединений
+    if not config.EMBEDDED_MODE:
+        db.engine = db.create_db_engine(pool_size=config.JOBS_WORKER_POSTGRES_POOL_SIZE)
+    cache.cache = redis_cache.CacheRedis(
+        cache_instance=redis.Redis(
+            connection_pool=redis_cache.create_redis_pool(
+                db=1, max_connections=config.JOBS_WORKER_REDIS_POOL_SIZE
+            )
+        )
+    )
+    leaderboard.leaderboard = leaderboard.Leaderboard(
+        redis_instance=cache.cache.cache
+    )
+    return JobQueue(
+        redis_instance=redis.Redis(
+            connection_pool=redis_cache.create_redis_pool(
+                db=config.JOBS_REDIS_DB, max_connections=config.JOBS_WORKER_REDIS_POOL_SIZE
+            )
+        )
+    )
+
+
+def shutdown(queue: JobQueue) -> None:
+    """Отключаемся от баз при остановке воркера"""
+    queue.close()
+    cache.cache.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    queue = startup()
+    worker = Worker(queue)
+    signal.signal(signal.SIGTERM, worker.handle_exit)
+    signal.signal(signal.SIGINT, worker.handle_exit)
+    try:
+        worker.run()
+    finally:
+        shutdown(queue)
+
+
+if __name__ == "__main__":
+    main()
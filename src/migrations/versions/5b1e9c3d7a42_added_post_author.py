@@ -0,0 +1,31 @@
+"""Added post author
+
+Revision ID: 5b1e9c3d7a42
+Revises: 0cd765f24db7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1e9c3d7a42'
+down_revision = '0cd765f24db7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('post', sa.Column('author_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('post_author_id_fkey', 'post', 'user', ['author_id'], ['id'])
+    op.create_index(
+        'ix_post_author_id_created_at_id', 'post', ['author_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_author_id_created_at_id', table_name='post')
+    op.drop_constraint('post_author_id_fkey', 'post', type_='foreignkey')
+    op.drop_column('post', 'author_id')
@@ -1,14 +1,21 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 __all__ = ("Post",)
 
 
 class Post(SQLModel, table=True):
+    # Лента автора: WHERE author_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (
+        Index("ix_post_author_id_created_at_id", "author_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(nullable=False)
     description: str = Field(nullable=False)
     views: int = Field(default=0)
-    created_at: datetime = Field(default=datetime.utcnow(), nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    author_id: Optional[int] = Field(default=None, foreign_key="user.id")
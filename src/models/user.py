@@ -32,7 +32,7 @@ class User(SQLModel, table=True):
         default_factory=new_uuid, nullable=False, sa_column_kwargs={'unique': True}
     )
     created_at: datetime = Field(
-        default=datetime.utcnow(), nullable=False
+        default_factory=datetime.utcnow, nullable=False
     )
     roles: List["Role"] = Relationship(
         back_populates="users", link_model=UserRoleLink
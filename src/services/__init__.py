@@ -1,2 +1,4 @@
 from .mixins import *
 from .post import *
+from .user import *
+from .container import *
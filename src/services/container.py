@@ -0,0 +1,70 @@
+from functools import cached_property
+
+from fastapi import Depends
+from sqlmodel import Session
+
+from src.auth import get_token_epochs
+from src.db import (
+    get_access_cash,
+    get_cache,
+    get_leaderboard,
+    get_post_feed,
+    get_refresh_cash,
+    get_session,
+)
+from src.jobs import get_job_queue
+from src.services.post import PostService
+from src.services.user import UserService
+
+__all__ = (
+    "ServiceContainer",
+    "get_container",
+    "get_post_service",
+    "get_user_service",
+)
+
+
+class ServiceContainer:
+    """
+    Сервисы одного запроса. Все сервисы делят одну сессию БД, а клиенты
+    кэшей — общие синглтоны, созданные при старте приложения.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @cached_property
+    def post_service(self) -> PostService:
+        return PostService(
+            cache=get_cache(),
+            session=self.session,
+            jobs=get_job_queue(),
+            leaderboard=get_leaderboard(),
+            feed=get_post_feed(),
+        )
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(
+            cache=get_cache(),
+            access_cash=get_access_cash(),
+            refresh_cash=get_refresh_cash(),
+            token_epochs=get_token_epochs(),
+            session=self.session,
+        )
+
+
+# FastAPI кэширует зависимость в пределах запроса, поэтому контейнер
+# (и сессия) создаётся один раз на запрос и не переживает его
+def get_container(session: Session = Depends(get_session)) -> ServiceContainer:
+    return ServiceContainer(session=session)
+
+
+# get_post_service — это провайдер PostService в рамках запроса
+def get_post_service(container: ServiceContainer = Depends(get_container)) -> PostService:
+    return container.post_service
+
+
+# get_user_service — это провайдер UserService в рамках запроса
+def get_user_service(container: ServiceContainer = Depends(get_container)) -> UserService:
+    return container.user_service
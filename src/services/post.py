@@ -1,46 +1,182 @@
+import base64
+import binascii
 import json
-from functools import lru_cache
-from typing import Optional
-from fastapi import Depends
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
 from sqlmodel import Session
 
-from src.api.v1.schemas import PostCreate, PostModel
-from src.db import AbstractCache, get_cache, get_session
-from src.models import Post
+from src.api.v1.schemas import PostCreate, PostModel, PostTimelineResponse
+from src.db import AbstractCache, Leaderboard, PostFeed
+from src.jobs import JobQueue
+from src.core import config
+from src.models import Post, User
 from src.services import ServiceMixin
 
 
-__all__ = ("PostService", "get_post_service")
+__all__ = ("PostService",)
 
 
 class PostService(ServiceMixin):
-    def get_post_list(self) -> dict:
-        """Получить список постов."""
+    def __init__(
+            self,
+            cache: AbstractCache,
+            session: Session,
+            jobs: JobQueue,
+            leaderboard: Leaderboard,
+            feed: PostFeed,
+    ):
+        super().__init__(cache=cache, session=session)
+        self.jobs = jobs
+        self.leaderboard = leaderboard
+        self.feed = feed
+
+    def get_post_list(self, fields: Optional[Sequence[str]] = None) -> dict:
+        """Получить список постов. fields — читать из БД только эти колонки."""
+        if fields:
+            rows = self.session.query(*self._columns(fields)).order_by(Post.created_at).all()
+            return {"posts": [row._asdict() for row in rows]}
+
         posts = self.session.query(Post).order_by(Post.created_at).all()
         return {"posts": [PostModel(**post.dict()) for post in posts]}
 
-    def get_post_detail(self, item_id: int) -> Optional[dict]:
-        """Получить детальную информацию поста."""
+    def get_post_detail(self, item_id: int, fields: Optional[Sequence[str]] = None) -> Optional[dict]:
+        """Получить детальную информацию поста. fields — вернуть только эти поля."""
         if cached_post := self.cache.get(key=f"{item_id}"):
-            return json.loads(cached_post)
+            self._record_view(item_id)
+            post = json.loads(cached_post)
+            return {field: post[field] for field in fields} if fields else post
+
+        if fields:
+            # Неполный пост не кэшируем, в кэше всегда лежит пост целиком
+            row = self.session.query(*self._columns(fields)).filter(Post.id == item_id).first()
+            if row:
+                self._record_view(item_id)
+            return row._asdict() if row else None
 
         post = self.session.query(Post).filter(Post.id == item_id).first()
         if post:
             self.cache.set(key=f"{post.id}", value=post.json())
+            self._record_view(post.id)
         return post.dict() if post else None
 
-    def create_post(self, post: PostCreate) -> dict:
+    def get_popular_posts(self, limit: int) -> dict:
+        """Получить самые просматриваемые посты."""
+        if not self.leaderboard.is_ready():
+            # Рейтинг потерян или ещё не построен: пересборку в фоне ставит
+            # только первый запрос, остальные делят короткоживущий ответ
+            # из Postgres, чтобы не сканировать таблицу на каждый запрос
+            if self.leaderboard.lock_rebuild():
+                self.jobs.enqueue("leaderboard.rebuild", {})
+            return self._get_popular_fallback(limit)
+
+        return self.get_post_batch(item_ids=self.leaderboard.top(limit))
+
+    def get_post_batch(self, item_ids: List[int]) -> dict:
+        """Получить несколько постов: кэш одним MGET, промахи одним запросом."""
+        item_ids = list(dict.fromkeys(item_ids))
+        cached = self.cache.get_many(keys=[f"{item_id}" for item_id in item_ids])
+        found = {
+            item_id: json.loads(value)
+            for item_id, value in zip(item_ids, cached) if value
+        }
+
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if missing:
+            posts = self.session.query(Post).filter(Post.id.in_(missing)).all()
+            self.cache.set_many(mapping={f"{post.id}": post.json() for post in posts})
+            found.update({post.id: post.dict() for post in posts})
+
+        return {"posts": [PostModel(**found[item_id]) for item_id in item_ids if item_id in found]}
+
+    def get_author_timeline(
+            self, author_uuid: str, cursor: Optional[str] = None, limit: int = config.TIMELINE_PAGE_SIZE,
+    ) -> Optional[dict]:
+        """
+        Посты автора от новых к старым с keyset-пагинацией.
+        None, если автора нет. Первая страница кэшируется до записи автора.
+        """
+        cacheable = cursor is None and limit == config.TIMELINE_PAGE_SIZE
+        if cacheable:
+            # Версию читаем до запроса к базе: если автор успеет написать пост,
+            # устаревшая страница ляжет под старую версию и не будет прочитана
+            cache_key = self._timeline_key(author_uuid)
+            if cached := self.cache.get(key=cache_key):
+                return json.loads(cached)
+
+        query = (
+            self.session.query(Post)
+            .join(User, Post.author_id == User.id)
+            .filter(User.uuid == author_uuid)
+        )
+        if cursor is not None:
+            query = query.filter(tuple_(Post.created_at, Post.id) < self._decode_cursor(cursor))
+        # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+        posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+
+        if not posts:
+            if self.session.query(User.id).filter(User.uuid == author_uuid).first() is None:
+                return None
+
+        next_cursor = self._encode_cursor(posts[limit - 1]) if len(posts) > limit else None
+        timeline = PostTimelineResponse(
+            posts=[PostModel(**post.dict()) for post in posts[:limit]],
+            next_cursor=next_cursor,
+        )
+        if cacheable:
+            self.cache.set(key=cache_key, value=timeline.json())
+        return timeline.dict()
+
+    def create_post(self, post: PostCreate, author: User) -> dict:
         """Создать пост."""
-        new_post = Post(title=post.title, description=post.description)
+        new_post = Post(title=post.title, description=post.description, author_id=author.id)
         self.session.add(new_post)
         self.session.commit()
         self.session.refresh(new_post)
+        # Первая страница ленты автора устарела: новая версия после коммита
+        self.cache.incr(key=self._timeline_version_key(author.uuid))
+        # Побочные эффекты записи выполняет воркер очереди
+        self.jobs.enqueue("post.created", {"post_id": new_post.id})
+        self.feed.publish(new_post.id, PostModel(**new_post.dict()).json())
         return new_post.dict()
 
-# get_post_service — это провайдер PostService. Синглтон
-@lru_cache()
-def get_post_service(
-    cache: AbstractCache = Depends(get_cache),
-    session: Session = Depends(get_session),
-) -> PostService:
-    return PostService(cache=cache, session=session)
+    def _get_popular_fallback(self, limit: int) -> dict:
+        key = f"popular:fallback:{limit}"
+        if (cached := self.cache.get(key=key)) is not None:
+            return self.get_post_batch(item_ids=json.loads(cached))
+        posts = self.session.query(Post).order_by(Post.views.desc()).limit(limit).all()
+        self.cache.set(
+            key=key,
+            value=json.dumps([post.id for post in posts]),
+            expire=config.POSTS_POPULAR_FALLBACK_EXPIRE_IN_SECONDS,
+        )
+        return {"posts": [PostModel(**post.dict()) for post in posts]}
+
+    def _timeline_key(self, author_uuid: str) -> str:
+        version = self.cache.get(key=self._timeline_version_key(author_uuid)) or 0
+        return f"timeline:{author_uuid}:{version}"
+
+    @staticmethod
+    def _timeline_version_key(author_uuid: str) -> str:
+        return f"timeline:version:{author_uuid}"
+
+    @staticmethod
+    def _encode_cursor(post: Post) -> str:
+        raw = f"{post.created_at.isoformat()}|{post.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(post_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError("invalid cursor")
+
+    @staticmethod
+    def _columns(fields: Sequence[str]) -> list:
+        return [getattr(Post, field) for field in fields]
+
+    def _record_view(self, item_id: int) -> None:
+        # В Postgres просмотры попадают пачкой, см. flush_post_views
+        self.leaderboard.record_view(item_id)
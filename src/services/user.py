@@ -1,22 +1,17 @@
-from functools import lru_cache
 from typing import Union
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, status
 from redis import Redis
 
 import src.auth as auth
 from src.api.v1.schemas.users import UserCreate, UserLogin
 from src.models import User
 from src.services import ServiceMixin
-from src.db import (
-    AbstractCache,
-    get_cache,
-    get_session,
-    get_access_cash,
-    get_refresh_cash
-)
+from src.db import AbstractCache
 
-__all__ = ("UserService", "get_user_service")
+__all__ = ("UserService",)
 
 
 class UserService(ServiceMixin):
@@ -24,25 +19,51 @@ class UserService(ServiceMixin):
                  cache: AbstractCache,
                  access_cash: Redis,
                  refresh_cash: Redis,
+                 token_epochs: auth.TokenEpochs,
                  session: Session):
         super().__init__(cache=cache, session=session)
         self.active_refresh_tokens = refresh_cash
         self.blocked_access_tokens = access_cash
+        self.token_epochs = token_epochs
 
     def create_user(self, user: UserCreate) -> User:
-        """Создать пользователя."""
-        if self.get_user_by_username(user.username) is not None:
-            raise HTTPException(
-                status_code=400, detail="User with this username already exists."
-            )
-
+        """Создать пользователя одним INSERT ... ON CONFLICT DO NOTHING."""
+        # bcrypt до первого обращения к БД, чтобы не держать соединение
         new_user = User(username=user.username, email=user.email)
         new_user.set_password(user.password)
-        self.session.add(new_user)
+
+        dialect = self.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = (
+            insert(User.__table__)
+            .values(**new_user.dict(exclude={"id"}))
+            .on_conflict_do_nothing()
+        )
+        if dialect == "postgresql":
+            result = self.session.execute(statement.returning(User.id))
+            row = result.first()
+            new_user.id = row.id if row else None
+        else:
+            # SQLAlchemy 1.4 не поддерживает RETURNING для SQLite
+            result = self.session.execute(statement)
+            new_user.id = result.inserted_primary_key[0] if result.rowcount else None
         self.session.commit()
-        self.session.refresh(new_user)
+
+        if new_user.id is None:
+            raise HTTPException(status_code=400, detail=self._conflict_reason(user))
         return new_user
 
+    def _conflict_reason(self, user: UserCreate) -> str:
+        """Какое уникальное поле помешало регистрации."""
+        existing = self.session.query(User.username, User.email).filter(
+            or_(User.username == user.username, User.email == user.email)
+        ).first()
+        if existing is None:
+            return "User already exists."
+        if existing.username == user.username:
+            return "User with this username already exists."
+        return "User with this email already exists."
+
     def get_user_by_username(self, username: str) -> Union[User, None]:
         """Получить пользователя по username"""
         user = self.session.query(User).filter(User.username == username).first()
@@ -69,8 +90,11 @@ class UserService(ServiceMixin):
             "refresh_token": self.create_refresh_token(user.uuid)
         }
 
-    def current_user(self, token: str):
-        """Получить текущего пользователя"""
+    def current_user(self, token: str, fresh: bool = False):
+        """
+        Получить текущего пользователя. fresh=True сверяет эпоху токена
+        с Redis, минуя локальный кэш.
+        """
         payload = auth.decode_token(token)
         if payload is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
@@ -81,6 +105,10 @@ class UserService(ServiceMixin):
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Token was blocked"
             )
         user_uuid: str = payload.get("user_uuid")
+        if payload.get("epoch", 0) < self.token_epochs.get(user_uuid, fresh=fresh):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Token was revoked"
+            )
         return self.get_user_by_uuid(user_uuid)
 
     def update_user(self, user: User, data: dict) -> User:
@@ -100,21 +128,25 @@ class UserService(ServiceMixin):
 
     def logout_all(self, token: str):
         """"Выход со всех устройств"""
-        payload = auth.decode_token(token)
-        jti, user_uuid = payload["jti"], payload["user_uuid"]
-        self.block_access_token(jti)
-        self.active_refresh_tokens.delete(user_uuid)
+        # Отозванный или заблокированный токен не должен снова сбрасывать эпоху,
+        # поэтому проверяем его так же, как при обычном запросе
+        user = self.current_user(token, fresh=True)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        # Все токены с прошлой эпохой, включая текущий, перестают действовать
+        self.token_epochs.bump(user.uuid)
+        self.active_refresh_tokens.delete(user.uuid)
 
     def create_refresh_token(self, user_uuid: str) -> str:
         subject = {"user_uuid": user_uuid}
-        refresh_token = auth.create_refresh_token(subject)
+        refresh_token = auth.create_refresh_token(subject, self.token_epochs.get(user_uuid, fresh=True))
         jti: str = auth.get_jti(refresh_token)
         self.active_refresh_tokens.lpush(user_uuid, jti)
         return refresh_token
 
     def create_access_token(self, user_uuid: str):
         subject = {"user_uuid": user_uuid}
-        return auth.create_access_token(subject)
+        return auth.create_access_token(subject, self.token_epochs.get(user_uuid, fresh=True))
 
     def block_access_token(self, jti: str) -> None:
         self.blocked_access_tokens.set(jti, 1)
@@ -123,20 +155,3 @@ class UserService(ServiceMixin):
         if self.blocked_access_tokens.get(jti):
             return True
         return False
-
-
-# get_post_service — это провайдер PostService. Синглтон
-@lru_cache()
-def get_user_service(
-        cache: AbstractCache = Depends(get_cache),
-        access_cash: Redis = Depends(get_access_cash),
-        refresh_cash: Redis = Depends(get_refresh_cash),
-        session: Session = Depends(get_session),
-
-) -> UserService:
-    return UserService(
-        cache=cache,
-        access_cash=access_cash,
-        refresh_cash=refresh_cash,
-        session=session
-    )